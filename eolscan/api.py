@@ -4,29 +4,46 @@ Provides REST endpoints and MCP-like functionality for production deployment
 """
 
 import os
+import gzip
 import json
+import asyncio
 import logging
+import itertools
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from pathlib import Path
 import tempfile
 import shutil
+from collections import Counter, OrderedDict
 
 from fastapi import FastAPI, HTTPException, Depends, status, BackgroundTasks
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from pydantic import BaseModel, Field
 import uvicorn
 
 from .cli import scan_repo, scan_path
-from .risk_model import assess_risk, get_risk_model
-from .util import setup_logging
+from .sbom import fetch_github_sbom_many
+from .risk_model import assess_risks, get_risk_model
+from .util import setup_logging, json_dumps, json_loads
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Load the risk model at import time: under `gunicorn --preload` this happens
+# once in the master, and forked workers share the model's pages copy-on-write
+try:
+    get_risk_model()
+except Exception as e:
+    logger.warning(f"Risk model preload failed, loading on first use: {e}")
+
 # Security
 security = HTTPBearer(auto_error=False)
 
@@ -69,7 +86,8 @@ app = FastAPI(
     description="Production-ready API for detecting EOL/EOS risks with ML-powered risk assessment",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse
 )
 
 # CORS middleware
@@ -82,8 +100,9 @@ app.add_middleware(
 )
 
 # Global variables
-SCAN_HISTORY = {}  # In production, use a proper database
+SCAN_HISTORY: "OrderedDict[str, dict]" = OrderedDict()  # Insertion (= time) ordered; in production, use a proper database
 MAX_SCAN_HISTORY = 1000
+HISTORY_GZIP_LEVEL = 6  # gzip level for stored responses (9 is ~3x slower for ~the same size)
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     """Verify API token"""
@@ -111,35 +130,53 @@ def verify_token_optional(credentials: Optional[HTTPAuthorizationCredentials] =
         )
     return verify_token(credentials)
 
+# Process-wide sequence so scans started in the same second still get distinct IDs
+# (next() on itertools.count is atomic, so worker threads can share it)
+_SCAN_SEQ = itertools.count(1)
+
 def generate_scan_id() -> str:
     """Generate unique scan ID"""
-    return f"scan_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+    return f"scan_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{next(_SCAN_SEQ)}"
 
 def create_summary(results: List[Dict]) -> Dict[str, Any]:
     """Create summary statistics from scan results"""
-    total_items = len(results)
-    eol_count = sum(1 for r in results if r.get('status') == 'EOL')
-    near_eol_count = sum(1 for r in results if r.get('status') == 'Near EOL')
-    supported_count = sum(1 for r in results if r.get('status') == 'Supported')
-    unknown_count = sum(1 for r in results if r.get('status') == 'Unknown')
-    
-    # Risk level distribution
-    risk_levels = {}
+    statuses = Counter()
+    risk_levels = Counter()
     for r in results:
-        risk_level = r.get('risk_level', 'UNKNOWN')
-        risk_levels[risk_level] = risk_levels.get(risk_level, 0) + 1
+        statuses[r.get('status')] += 1
+        risk_levels[r.get('risk_level', 'UNKNOWN')] += 1
     
     return {
-        "total_items": total_items,
-        "eol_count": eol_count,
-        "near_eol_count": near_eol_count,
-        "supported_count": supported_count,
-        "unknown_count": unknown_count,
-        "risk_levels": risk_levels,
-        "critical_risks": risk_levels.get('CRITICAL', 0),
-        "high_risks": risk_levels.get('HIGH', 0)
+        "total_items": len(results),
+        "eol_count": statuses['EOL'],
+        "near_eol_count": statuses['Near EOL'],
+        "supported_count": statuses['Supported'],
+        "unknown_count": statuses['Unknown'],
+        "risk_levels": dict(risk_levels),
+        "critical_risks": risk_levels['CRITICAL'],
+        "high_risks": risk_levels['HIGH']
     }
 
+def apply_risk_assessment(results: List[Dict]) -> List[Dict]:
+    """Risk-assess runtime/package entries in one batch; other entries pass through"""
+    indices = [i for i, r in enumerate(results) if r.get('type') in ['runtime', 'package']]
+    if not indices:
+        return results
+    try:
+        assessed = assess_risks([results[i] for i in indices])
+    except Exception as risk_error:
+        logger.warning(f"Risk assessment failed: {risk_error}")
+        return results
+    
+    enhanced_results = list(results)
+    for i, enhanced_result in zip(indices, assessed):
+        enhanced_results[i] = enhanced_result
+    return enhanced_results
+
+def _history_view(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """History entry without the compressed response (use GET /scan/{scan_id} for that)"""
+    return {k: v for k, v in entry.items() if k != "response_gz"}
+
 @app.get("/", response_model=Dict[str, str])
 async def root():
     """Root endpoint"""
@@ -228,7 +265,8 @@ async def scan_endpoint(
         try:
             if request.repo:
                 logger.info(f"Scanning repo: {request.repo}")
-                results = scan_repo(
+                results = await asyncio.to_thread(
+                    scan_repo,
                     owner_repo=request.repo,
                     ref=request.ref,
                     token=github_token,
@@ -236,7 +274,8 @@ async def scan_endpoint(
                 )
             else:
                 logger.info(f"Scanning path: {request.path}")
-                results = scan_path(
+                results = await asyncio.to_thread(
+                    scan_path,
                     path=Path(request.path),
                     near_months=request.near_months,
                     sbom_path=request.sbom_path
@@ -252,51 +291,46 @@ async def scan_endpoint(
         
         # Add risk assessment if requested
         if request.include_risk_assessment and results:
-            enhanced_results = []
-            for result in results:
-                if result.get('type') in ['runtime', 'package']:
-                    try:
-                        enhanced_result = assess_risk(result)
-                        enhanced_results.append(enhanced_result)
-                    except Exception as risk_error:
-                        logger.warning(f"Risk assessment failed for {result.get('name', 'unknown')}: {risk_error}")
-                        enhanced_results.append(result)
-                else:
-                    enhanced_results.append(result)
-            results = enhanced_results
+            results = apply_risk_assessment(results)
         
         # Create summary
         summary = create_summary(results)
         
-        # Prepare response
-        response = ScanResponse(
-            scan_id=scan_id,
-            timestamp=start_time.isoformat(),
-            results=results,
-            summary=summary,
-            metadata={
-                "scan_type": "repo" if request.repo else "path",
-                "target": request.repo or request.path,
-                "near_months": request.near_months,
-                "risk_assessment_included": request.include_risk_assessment,
-                "processing_time_ms": (datetime.now() - start_time).total_seconds() * 1000
-            }
-        )
+        # Prepare response; encoded once and reused for the wire and the history
+        metadata = {
+            "scan_type": "repo" if request.repo else "path",
+            "target": request.repo or request.path,
+            "near_months": request.near_months,
+            "risk_assessment_included": request.include_risk_assessment,
+            "processing_time_ms": (datetime.now() - start_time).total_seconds() * 1000
+        }
+        body = json_dumps({
+            "scan_id": scan_id,
+            "timestamp": start_time.isoformat(),
+            "results": results,
+            "summary": summary,
+            "risk_assessment": None,
+            "metadata": metadata
+        })
         
         # Store in history (in production, use database)
+        # The encoded response is kept gzipped; only the summary stays as Python objects.
+        # Compressed in a worker thread so the event loop keeps serving other requests
+        response_gz = await asyncio.to_thread(gzip.compress, body, compresslevel=HISTORY_GZIP_LEVEL)
         SCAN_HISTORY[scan_id] = {
-            "request": request.dict(),
-            "response": response.dict(),
-            "timestamp": start_time.isoformat()
+            "scan_id": scan_id,
+            "request": request.model_dump(),
+            "summary": summary,
+            "metadata": metadata,
+            "timestamp": start_time.isoformat(),
+            "response_gz": response_gz
         }
         
         # Cleanup old history
-        if len(SCAN_HISTORY) > MAX_SCAN_HISTORY:
-            oldest_keys = sorted(SCAN_HISTORY.keys())[:len(SCAN_HISTORY) - MAX_SCAN_HISTORY]
-            for key in oldest_keys:
-                del SCAN_HISTORY[key]
+        while len(SCAN_HISTORY) > MAX_SCAN_HISTORY:
+            SCAN_HISTORY.popitem(last=False)
         
-        return response
+        return Response(content=body, media_type="application/json")
         
     except Exception as e:
         logger.error(f"Scan failed: {e}")
@@ -317,14 +351,19 @@ async def get_scan_result(
             detail="Scan not found"
         )
     
-    return SCAN_HISTORY[scan_id]
+    entry = SCAN_HISTORY[scan_id]
+    return {
+        "request": entry["request"],
+        "response": json_loads(gzip.decompress(entry["response_gz"])),
+        "timestamp": entry["timestamp"]
+    }
 
 @app.get("/scan", response_model=Dict[str, Any])
 async def get_scan_status(
     token: str = Depends(verify_token_optional)
 ):
     """Get scan status and recent scans"""
-    recent_scans = list(SCAN_HISTORY.values())[-5:]  # Last 5 scans
+    recent_scans = [_history_view(e) for e in list(SCAN_HISTORY.values())[-5:]]  # Last 5 scans
     return {
         "total_scans": len(SCAN_HISTORY),
         "recent_scans": recent_scans,
@@ -337,9 +376,47 @@ async def list_scans(
     token: str = Depends(verify_token)
 ):
     """List recent scans"""
-    scans = list(SCAN_HISTORY.values())
-    scans.sort(key=lambda x: x['timestamp'], reverse=True)
-    return scans[:limit]
+    return [_history_view(e) for e in itertools.islice(reversed(SCAN_HISTORY.values()), max(limit, 0))]
+
+def _run_batch_item(i: int, request: ScanRequest, sbom: Optional[tuple] = None) -> Dict[str, Any]:
+    """Scan and risk-assess a single batch entry (runs in a worker thread)"""
+    # Create a temporary scan ID for batch
+    scan_id = f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{i}"
+    
+    # Perform scan with timeout handling
+    try:
+        if request.repo:
+            scan_results = scan_repo(
+                owner_repo=request.repo,
+                ref=request.ref,
+                token=os.getenv("GITHUB_TOKEN"),
+                near_months=request.near_months,
+                sbom=sbom
+            )
+        else:
+            scan_results = scan_path(
+                path=Path(request.path),
+                near_months=request.near_months,
+                sbom_path=request.sbom_path
+            )
+    except Exception as scan_error:
+        scan_results = [{
+            "type": "error",
+            "message": f"Scan failed: {str(scan_error)}",
+            "target": request.repo or request.path
+        }]
+    
+    # Add risk assessment
+    if request.include_risk_assessment and scan_results:
+        scan_results = apply_risk_assessment(scan_results)
+    
+    return {
+        "scan_id": scan_id,
+        "request": request.model_dump(),
+        "results": scan_results,
+        "summary": create_summary(scan_results),
+        "status": "success"
+    }
 
 @app.post("/scan/batch")
 async def batch_scan(
@@ -354,64 +431,31 @@ async def batch_scan(
             detail="Batch size cannot exceed 10"
         )
     
-    results = []
-    for i, request in enumerate(requests):
+    # Fetch all repo SBOMs in one concurrent wave before the per-item scans
+    repos = [request.repo for request in requests if request.repo]
+    sboms = {}
+    if repos:
         try:
-            # Create a temporary scan ID for batch
-            scan_id = f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{i}"
-            
-            # Perform scan with timeout handling
-            try:
-                if request.repo:
-                    scan_results = scan_repo(
-                        owner_repo=request.repo,
-                        ref=request.ref,
-                        token=os.getenv("GITHUB_TOKEN"),
-                        near_months=request.near_months
-                    )
-                else:
-                    scan_results = scan_path(
-                        path=Path(request.path),
-                        near_months=request.near_months,
-                        sbom_path=request.sbom_path
-                    )
-            except Exception as scan_error:
-                scan_results = [{
-                    "type": "error",
-                    "message": f"Scan failed: {str(scan_error)}",
-                    "target": request.repo or request.path
-                }]
-            
-            # Add risk assessment
-            if request.include_risk_assessment and scan_results:
-                enhanced_results = []
-                for result in scan_results:
-                    if result.get('type') in ['runtime', 'package']:
-                        try:
-                            enhanced_result = assess_risk(result)
-                            enhanced_results.append(enhanced_result)
-                        except Exception as risk_error:
-                            logger.warning(f"Risk assessment failed for {result.get('name', 'unknown')}: {risk_error}")
-                            enhanced_results.append(result)
-                    else:
-                        enhanced_results.append(result)
-                scan_results = enhanced_results
-            
-            results.append({
-                "scan_id": scan_id,
-                "request": request.dict(),
-                "results": scan_results,
-                "summary": create_summary(scan_results),
-                "status": "success"
-            })
-            
-        except Exception as e:
-            results.append({
+            sboms = await fetch_github_sbom_many(repos, os.getenv("GITHUB_TOKEN"))
+        except Exception as sbom_error:
+            logger.warning(f"SBOM prefetch failed: {sbom_error}")
+    
+    tasks = [
+        asyncio.to_thread(_run_batch_item, i, request, sboms.get(request.repo))
+        for i, request in enumerate(requests)
+    ]
+    items = await asyncio.gather(*tasks, return_exceptions=True)
+    
+    results = []
+    for i, (request, item) in enumerate(zip(requests, items)):
+        if isinstance(item, Exception):
+            item = {
                 "scan_id": f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{i}",
-                "request": request.dict(),
-                "error": str(e),
+                "request": request.model_dump(),
+                "error": str(item),
                 "status": "failed"
-            })
+            }
+        results.append(item)
     
     return {
         "batch_id": f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
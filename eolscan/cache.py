@@ -0,0 +1,148 @@
+"""
+TTL memoization for outbound lookups (PyPI, npm, endoflife.date).
+
+Results are stored in Redis when REDIS_URL is set, otherwise in a bounded
+in-process cache. Values must be JSON-serializable (dates as ISO strings).
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import logging
+import functools
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DAY = 24 * 60 * 60
+LOCAL_MAXSIZE = 4096
+
+_MISS = object()
+
+
+class _LocalStore:
+    """Thread-safe LRU store with per-key expiry"""
+
+    def __init__(self, maxsize: int = LOCAL_MAXSIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISS
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return _MISS
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class _RedisStore:
+    """Redis store; values are gzipped JSON"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        try:
+            raw = self.client.get(key)
+        except Exception as e:
+            logger.warning(f"Redis get failed: {e}")
+            return _MISS
+        if raw is None:
+            return _MISS
+        return json.loads(gzip.decompress(raw))
+
+    def set(self, key, value, ttl):
+        try:
+            self.client.setex(key, int(ttl), gzip.compress(json.dumps(value).encode("utf-8")))
+        except Exception as e:
+            logger.warning(f"Redis set failed: {e}")
+
+    def clear(self):
+        pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Get or create the process-wide cache store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _create_store()
+    return _store
+
+
+def _create_store():
+    url = os.getenv("REDIS_URL")
+    if url:
+        try:
+            import redis
+            client = redis.Redis.from_url(url)
+            client.ping()
+            logger.info("Using Redis cache")
+            return _RedisStore(client)
+        except Exception as e:
+            logger.warning(f"Redis unavailable ({e}), using in-process cache")
+    return _LocalStore()
+
+
+def make_key(fn, args, kwargs) -> str:
+    """Stable cache key for a call: sha1 of qualified name + JSON arguments"""
+    payload = json.dumps([args, kwargs], sort_keys=True, default=str)
+    name = f"{fn.__module__}.{fn.__qualname__}"
+    return "eolscan:" + hashlib.sha1((name + payload).encode("utf-8")).hexdigest()
+
+
+def memoize(ttl: int):
+    """
+    Cache a function's return value for `ttl` seconds.
+    `None` results are not cached so transient failures are retried.
+    Exposes `cache_get(*args)` / `cache_set(value, *args)` for batch callers.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = make_key(fn, args, kwargs)
+            value = get_store().get(key)
+            if value is not _MISS:
+                return value
+            value = fn(*args, **kwargs)
+            if value is not None:
+                get_store().set(key, value, ttl)
+            return value
+
+        def cache_get(*args, **kwargs):
+            value = get_store().get(make_key(fn, args, kwargs))
+            return None if value is _MISS else value
+
+        def cache_set(value, *args, **kwargs):
+            if value is not None:
+                get_store().set(make_key(fn, args, kwargs), value, ttl)
+
+        wrapper.cache_get = cache_get
+        wrapper.cache_set = cache_set
+        return wrapper
+    return decorator
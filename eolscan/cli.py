@@ -1,64 +1,73 @@
-import argparse, json, os, sys, io, zipfile, tempfile, requests
+import argparse, json, operator, os, re, sys, zipfile, tempfile, shutil, base64, requests, datetime as dt
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from tabulate import tabulate
 
-from .parsers import find_python_version, find_node_version, find_os_from_docker
+from .http import SESSION
+from .util import json_dumps
+from .parsers import find_python_version, find_node_version, find_os_from_docker, manifest_map, MANIFEST_FILES
 from .eol_data import EOL_SLUGS, assess
-from .pypi_npm import pypi_last_release, npm_last_release, stale_status
+from .pypi_npm import pypi_last_release_many, npm_last_release_many, stale_status
 from .sbom import fetch_github_sbom, parse_local_sbom, runtime_hits
-from .eol_data import EOL_SLUGS, assess
 
-def assess_from_components(components, near_months):
+def assess_from_components(components, near_months, today=None):
+    """Assess the runtimes/OS among parse_local_sbom's {'names','versions'} lists"""
+    today = today or dt.date.today()
     out = []
     for hit in runtime_hits(components):
-        out.append(assess(hit["slug"], hit["name"], hit["version"], near_months))
+        out.append(assess(hit["slug"], hit["name"], hit["version"], near_months, today))
+    return out
+
+# Package name of a requirements.txt line with a version constraint (extras allowed)
+_REQ_RE = re.compile(r"^[ \t]*([A-Za-z0-9_.\-]+)[ \t]*(?:\[[^\]\n]*\][ \t]*)?(?:==|>=|~=|<=|!=)", re.M)
+
+def _stale_packages(ecosystem, pkgs, last_releases, today=None):
+    out = []
+    for pkg in dict.fromkeys(pkgs):
+        last = last_releases.get(pkg)
+        status = stale_status(last, months_stale=24, today=today)
+        if status:
+            out.append({
+                "type":"package","ecosystem":ecosystem,"name":pkg,"version":None,
+                "status":status[0],"last_release":last,"days_since_release":-status[1]
+            })
     return out
 
-def scan_path(path: Path, near_months=6, sbom_path: str | None = None):
+def scan_path(path: Path, near_months=6, sbom_path: str | None = None, today: dt.date | None = None):
+    today = today or dt.date.today()  # one date for the whole scan
     results = []
     if sbom_path:
         comps = parse_local_sbom(sbom_path)
-        results.extend(assess_from_components(comps, near_months))
+        results.extend(assess_from_components(comps, near_months, today))
         return results
 
-    py_ver = find_python_version(path)
+    manifests = manifest_map(path)
+    py_ver = find_python_version(path, manifests)
     if py_ver:
-        results.append(assess(EOL_SLUGS["python"], "Python", py_ver, near_months))
+        results.append(assess(EOL_SLUGS["python"], "Python", py_ver, near_months, today))
 
-    node_ver = find_node_version(path)
+    node_ver = find_node_version(path, manifests)
     if node_ver:
-        results.append(assess(EOL_SLUGS["node"], "Node.js", node_ver, near_months))
+        results.append(assess(EOL_SLUGS["node"], "Node.js", node_ver, near_months, today))
 
-    os_info = find_os_from_docker(path)
+    os_info = find_os_from_docker(path, manifests)
     if os_info:
         os_name, os_version = os_info
         slug = EOL_SLUGS.get(os_name, os_name)
-        results.append(assess(slug, os_name.title(), os_version, near_months))
+        results.append(assess(slug, os_name.title(), os_version, near_months, today))
 
     # Optional lightweight “stale lib” signals
-    req = path / "requirements.txt"
-    if req.exists():
-        for line in req.read_text(errors="ignore").splitlines():
-            if "==" in line and not line.strip().startswith("#"):
-                pkg = line.split("==")[0].strip()
-                last = pypi_last_release(pkg)
-                status = stale_status(last, months_stale=24)
-                if status:
-                    results.append({
-                        "type":"package","ecosystem":"PyPI","name":pkg,"version":None,
-                        "status":status[0],"last_release":last,"days_since_release":-status[1]
-                    })
-
-    pkgjson = path / "package.json"
-    if pkgjson.exists():
-        last = npm_last_release("express")  # placeholder; expand to parse all deps if desired
-        if last:
-            status = stale_status(last, months_stale=24)
-            if status:
-                results.append({
-                    "type":"package","ecosystem":"npm","name":"(example) express","version":None,
-                    "status":status[0],"last_release":last,"days_since_release":-status[1]
-                })
+    if "requirements.txt" in manifests:
+        pkgs = _REQ_RE.findall(Path(manifests["requirements.txt"]).read_text(errors="ignore"))
+        results.extend(_stale_packages("PyPI", pkgs, pypi_last_release_many(pkgs), today))
+
+    if "package.json" in manifests:
+        try:
+            data = json.loads(Path(manifests["package.json"]).read_text(errors="ignore") or "{}")
+        except ValueError:
+            data = {}
+        pkgs = [*(data.get("dependencies") or {}), *(data.get("devDependencies") or {})]
+        results.extend(_stale_packages("npm", pkgs, npm_last_release_many(pkgs), today))
     return results
 
 def _headers(token: str | None):
@@ -70,54 +79,115 @@ def _headers(token: str | None):
 def _download_repo_to_temp(owner_repo: str, ref: str | None, token: str | None) -> Path:
     owner, name = owner_repo.split("/", 1)
     if not ref:
-        r = requests.get(f"https://api.github.com/repos/{owner}/{name}", headers=_headers(token), timeout=30)
+        r = SESSION.get(f"https://api.github.com/repos/{owner}/{name}", headers=_headers(token), timeout=30)
         r.raise_for_status()
         ref = r.json().get("default_branch", "main")
     url = f"https://api.github.com/repos/{owner}/{name}/zipball/{ref}"
-    r = requests.get(url, headers=_headers(token), timeout=180)
+    with tempfile.TemporaryFile() as tmp:
+        with SESSION.get(url, headers=_headers(token), timeout=180, stream=True) as r:
+            r.raise_for_status()
+            r.raw.decode_content = True
+            shutil.copyfileobj(r.raw, tmp)
+        # Only create the directory once the archive is in hand; remove it if extraction fails
+        tmpdir = Path(tempfile.mkdtemp(prefix="repo_"))
+        try:
+            with zipfile.ZipFile(tmp) as z:
+                for info in z.infolist():
+                    # "<owner>-<repo>-<sha>/<name>": the scanners only read the repo's top level
+                    parts = info.filename.split("/")
+                    if len(parts) == 2 and parts[1] in MANIFEST_FILES:
+                        (tmpdir / parts[1]).write_bytes(z.read(info))
+        except Exception:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+            raise
+    return tmpdir
+
+def _fetch_manifest(owner_repo: str, path: str, ref: str | None, token: str | None) -> str | None:
+    owner, name = owner_repo.split("/", 1)
+    params = {"ref": ref} if ref else None
+    r = SESSION.get(f"https://api.github.com/repos/{owner}/{name}/contents/{path}",
+                     headers=_headers(token), params=params, timeout=30)
+    if r.status_code == 404:
+        return None
     r.raise_for_status()
-    z = zipfile.ZipFile(io.BytesIO(r.content))
+    data = r.json()
+    # directories come back as lists; files over 1 MB have no inline content
+    if not isinstance(data, dict) or data.get("encoding") != "base64":
+        return None
+    return base64.b64decode(data.get("content", "")).decode("utf-8", "ignore")
+
+def _fetch_manifests_to_temp(owner_repo: str, ref: str | None, token: str | None) -> Path | None:
+    """Fetch only the manifest files via the contents API; None if the repo has none."""
+    names = sorted(MANIFEST_FILES)
+    # One file first: a 403/429 (rate limit, no access) raises after a single call
+    # instead of spending one request per manifest
+    texts = [_fetch_manifest(owner_repo, names[0], ref, token)]
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        texts.extend(ex.map(lambda n: _fetch_manifest(owner_repo, n, ref, token), names[1:]))
+    if all(t is None for t in texts):
+        return None
     tmpdir = Path(tempfile.mkdtemp(prefix="repo_"))
-    z.extractall(tmpdir)
-    roots = list(tmpdir.glob("*"))
-    return roots[0] if roots else tmpdir
-
-def scan_repo(owner_repo: str, ref: str | None = None, token: str | None = None, near_months: int = 6):
+    for fname, text in zip(names, texts):
+        if text is not None:
+            (tmpdir / fname).write_text(text, encoding="utf-8")
+    return tmpdir
+
+def _request_error(e: Exception) -> str:
+    """Short description of a failed GitHub call: status and API message when there is a response"""
+    response = getattr(e, "response", None)
+    if response is None:
+        return str(e)
+    try:
+        msg = response.json().get("message","")
+    except Exception:
+        msg = response.text
+    return f"HTTP {response.status_code}: {msg}"
+
+# PackageName followed by its PackageVersion (other tags may sit in between)
+_SPDX_RE = re.compile(
+    r"^[ \t]*PackageName:[ \t]*(.*?)[ \t\r]*$"
+    r"(?:\n(?![ \t]*PackageName:).*$)*?"
+    r"\n[ \t]*PackageVersion:[ \t]*(.*?)[ \t\r]*$",
+    re.M,
+)
+
+def scan_repo(owner_repo: str, ref: str | None = None, token: str | None = None, near_months: int = 6,
+              today: dt.date | None = None, sbom: tuple | None = None):
+    """`sbom` is a prefetched (spdx, error) pair from fetch_github_sbom_many"""
+    today = today or dt.date.today()
     # 1) Try SBOM first
-    spdx, err = fetch_github_sbom(owner_repo, token)
+    spdx, err = sbom if sbom is not None else fetch_github_sbom(owner_repo, token)
     if spdx:
         out = []
-        name = None; version = None
-        for line in spdx.splitlines():
-            if line.strip().startswith("PackageName:"):
-                name = line.split(":",1)[1].strip()
-            if line.strip().startswith("PackageVersion:"):
-                version = line.split(":",1)[1].strip()
-                low = (name or "").lower()
-                if "python" in low:
-                    out.append(assess(EOL_SLUGS["python"], "Python", version, near_months))
-                if low in ("node","nodejs") or "node.js" in low:
-                    out.append(assess(EOL_SLUGS["node"], "Node.js", version, near_months))
-                name = None; version = None
+        for m in _SPDX_RE.finditer(spdx):
+            name, version = m.group(1), m.group(2)
+            low = name.lower()
+            # independent checks: a name matching both (e.g. "python-node.js") yields both
+            if "python" in low:
+                out.append(assess(EOL_SLUGS["python"], "Python", version, near_months, today))
+            if low in ("node", "nodejs") or "node.js" in low:
+                out.append(assess(EOL_SLUGS["node"], "Node.js", version, near_months, today))
         if out:
             return out
         # fall through if SBOM had no useful entries
 
-    # 2) Fallback: download zipball and run path scanners
+    # 2) Fallback: fetch manifests (zipball if none found or the contents API errors) and run path scanners
+    manifest_err = None
+    try:
+        root = _fetch_manifests_to_temp(owner_repo, ref, token)
+    except requests.RequestException as e:
+        root, manifest_err = None, _request_error(e)
     try:
-        root = _download_repo_to_temp(owner_repo, ref, token)
-        out = scan_path(root, near_months=near_months)
+        root = root or _download_repo_to_temp(owner_repo, ref, token)
+        out = scan_path(root, near_months=near_months, today=today)
         # out.insert(0, {"type":"note","message":"SBOM unavailable; used zipball fallback."})
         return out
-    except requests.HTTPError as e:
-        msg = ""
-        try:
-            msg = e.response.json().get("message","")
-        except Exception:
-            msg = e.response.text
-        return [{"type":"note","message": f"Zipball fallback failed (HTTP {e.response.status_code}): {msg}"}]
     except Exception as e:
-        return [{"type":"note","message": f"Zipball fallback failed: {e}"}]
+        prefix = f"Manifest fetch failed ({manifest_err}); " if manifest_err else ""
+        return [{"type":"note","message": f"{prefix}Zipball fallback failed ({_request_error(e)})"}]
+    finally:
+        if root:
+            shutil.rmtree(root, ignore_errors=True)
 
 def main():
     ap = argparse.ArgumentParser(prog="eol-scan", description="EOL/EOS scanner for repos or local paths")
@@ -152,14 +222,17 @@ def main():
         ap.print_help(); sys.exit(1)
 
     if args.table:
-        headers = sorted({k for r in res for k in r.keys()})
-        rows = [[r.get(h,"") for h in headers] for r in res]
+        # columns in first-seen order; itemgetter where every row has the key
+        headers = list(dict.fromkeys(k for r in res for k in r))
+        getters = [operator.itemgetter(h) if all(h in r for r in res) else (lambda r, h=h: r.get(h,""))
+                   for h in headers]
+        rows = [[g(r) for g in getters] for r in res]
         print(tabulate(rows, headers=headers, tablefmt="github"))
     else:
-        print(json.dumps(res, indent=2))
+        print(json_dumps(res, indent=True).decode("utf-8"))
 
     if args.out:
-        Path(args.out).write_text(json.dumps(res, indent=2), encoding="utf-8")
+        Path(args.out).write_bytes(json_dumps(res, indent=True))
         print(f"Wrote {args.out}")
 
 if __name__ == "__main__":
@@ -1,28 +1,60 @@
-import requests
+import os, json, tempfile
+from pathlib import Path
 from .util import status_from_eol, parse_semver
+from .cache import memoize, DAY
+from . import http
 BASE = "https://endoflife.date/api"
 EOL_SLUGS={"python":"python","node":"nodejs","nodejs":"nodejs","java":"java","go":"go","golang":"go","dotnet":"dotnet","ruby":"ruby","php":"php","rust":"rust","ubuntu":"ubuntu","debian":"debian","alpine":"alpine","centos":"centos","rocky":"rocky-linux","rhel":"rhel"}
 
+def _cache_dir():
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(os.getenv("EOLSCAN_CACHE_DIR") or os.path.join(base, "eolscan"))
+
+def _write_atomic(path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name)
+    with os.fdopen(fd, "wb") as f: f.write(data)
+    os.replace(tmp, path)
+
+@memoize(ttl=DAY)
 def fetch_family(slug):
-    r = requests.get(f"{BASE}/{slug}.json", timeout=30); r.raise_for_status(); return r.json()
+    """Family JSON, revalidated against a disk copy with If-None-Match (304 = reuse)."""
+    body_path = _cache_dir()/f"eol-{slug}.json"; etag_path = _cache_dir()/f"eol-{slug}.etag"
+    headers = {}
+    try:
+        cached = body_path.read_bytes(); headers["If-None-Match"] = etag_path.read_text().strip()
+    except OSError: cached = None
+    r = http.get(f"{BASE}/{slug}.json", headers=headers, timeout=30)
+    if r.status_code == 304 and cached is not None: return json.loads(cached)
+    r.raise_for_status()
+    etag = r.headers.get("ETag")
+    if etag:
+        try:
+            _write_atomic(body_path, r.content); _write_atomic(etag_path, etag.encode())
+        except OSError: pass
+    return r.json()
+
+def _cycle_index(entries):
+    by_cycle = {}
+    for e in entries:
+        for k in ("cycle","releaseCycle"):
+            v = e.get(k)
+            if v is not None: by_cycle.setdefault(str(v), e)
+    return by_cycle
 
 def find_version_entry(entries, version):
     if not version: return None
     target = parse_semver(version)
     if not target: return None
-    for e in entries:
-        if str(e.get("cycle"))==target or str(e.get("releaseCycle"))==target: return e
-    major = target.split(".")[0]
-    for e in entries:
-        if str(e.get("cycle")) in (target, major): return e
-    return None
+    by_cycle = _cycle_index(entries)
+    return by_cycle.get(target) or by_cycle.get(target.split(".")[0])
 
-def assess(slug, name, version, near_months=6):
+def assess(slug, name, version, near_months=6, today=None):
     try: entries = fetch_family(slug)
     except Exception as e: return {"type":"runtime","name":name,"version":version,"status":"Unknown","error":str(e)}
     entry = find_version_entry(entries, version)
     if not entry: return {"type":"runtime","name":name,"version":version,"status":"Unknown"}
     eol = entry.get("eol") or entry.get("support") or entry.get("end")
-    status, days = status_from_eol(eol, near_months)
+    status, days = status_from_eol(eol, near_months, today)
     latest = entries[0].get("latest") if entries else None
     return {"type":"runtime","name":name,"version":version,"status":status,"eol_date":eol,"days_to_eol":days,"latest":latest}
@@ -0,0 +1,116 @@
+"""
+Shared HTTP session: keep-alive connection pooling and retries for all
+outbound calls (GitHub, endoflife.date, PyPI, npm).
+
+Calls to third-party data sources go through `get` / `async_get`, which
+bound concurrency and request rate process-wide. Tune with
+EOLSCAN_HTTP_CONCURRENCY (default 8) and EOLSCAN_HTTP_RPS (default 20).
+"""
+
+import os
+import time
+import importlib.util
+import asyncio
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+USER_AGENT = "eol-eos-scanner"
+POOL_SIZE = 32
+HTTP_CONCURRENCY = int(os.getenv("EOLSCAN_HTTP_CONCURRENCY", "8"))
+HTTP_RPS = float(os.getenv("EOLSCAN_HTTP_RPS", "20"))
+MAX_429_RETRIES = 3
+# httpx raises on http2=True without the h2 package (httpx[http2]); use HTTP/1.1 then
+HTTP2 = importlib.util.find_spec("h2") is not None
+MAX_RETRY_AFTER = 60.0  # longest Retry-After wait honoured, sync and async
+# Statuses SESSION's Retry policy retries: transient, worth another attempt
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class _CappedRetry(Retry):
+    """Retry whose Retry-After waits are capped at MAX_RETRY_AFTER: the sleep
+    happens while get() holds a concurrency slot, so it must stay short"""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, MAX_RETRY_AFTER)
+
+
+def _create_session() -> requests.Session:
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    retry = _CappedRetry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=RETRY_STATUSES,
+        raise_on_status=False,  # hand the last response back to the caller
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+SESSION = _create_session()
+
+
+class RateLimiter:
+    """Thread-safe token bucket: `rate` requests per second, bursts up to `rate`"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token and return how long to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def wait(self):
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def wait_async(self):
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+LIMITER = RateLimiter(HTTP_RPS)
+_SLOTS = threading.BoundedSemaphore(HTTP_CONCURRENCY)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """SESSION.get bounded by the process-wide concurrency cap and rate limit.
+    429s are retried by the session's Retry policy, which honours Retry-After
+    up to MAX_RETRY_AFTER seconds."""
+    with _SLOTS:
+        LIMITER.wait()
+        return SESSION.get(url, **kwargs)
+
+
+def _retry_after(response, attempt: int) -> float:
+    try:
+        return min(float(response.headers.get("Retry-After", "")), MAX_RETRY_AFTER)
+    except ValueError:
+        return 0.5 * 2 ** attempt
+
+
+async def async_get(client, url: str, slots: asyncio.Semaphore, **kwargs):
+    """client.get under an event-loop semaphore and the shared rate limit;
+    retries 429 responses after Retry-After (or exponential backoff)."""
+    for attempt in range(MAX_429_RETRIES + 1):
+        async with slots:
+            await LIMITER.wait_async()
+            r = await client.get(url, **kwargs)
+        if r.status_code != 429 or attempt == MAX_429_RETRIES:
+            return r
+        await asyncio.sleep(_retry_after(r, attempt))
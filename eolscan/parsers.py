@@ -1,48 +1,70 @@
-import json, re
+import json, re, os, functools
 from pathlib import Path
 
+# Files the scanners read; everything else in a repo can be skipped
+MANIFEST_FILES = {".python-version",".nvmrc",".node-version","Dockerfile","pyproject.toml","package.json","requirements.txt"}
+
+_PY_DOCKER = re.compile(rb"FROM\s+python:(\d+(?:\.\d+)*)", re.I)
+_NODE_DOCKER = re.compile(rb"FROM\s+node:(\d+(?:\.\d+)*)", re.I)
+_OS_DOCKER = re.compile(rb"FROM\s+(ubuntu|debian|alpine|centos|rockylinux|rhel):([\w\.\-]+)", re.I)
+_PY_PYPROJECT = re.compile(r'python\s*=\s*"[^\d]*(\d+(\.\d+)*)')
+_VERSION = re.compile(r"(\d+(\.\d+)*)")
+
+@functools.lru_cache(maxsize=64)
+def _read_bytes(path, mtime_ns, size):
+    try: return Path(path).read_bytes()
+    except Exception: return b""
+
+def _read_dockerfile(manifests):
+    """Dockerfile bytes (b"" if absent); cached until the file changes."""
+    path = manifests.get("Dockerfile")
+    if not path: return b""
+    try: st = os.stat(path)
+    except OSError: return b""
+    return _read_bytes(path, st.st_mtime_ns, st.st_size)
+
+def manifest_map(root) -> dict[str, str]:
+    """{filename: path} of the MANIFEST_FILES present in root, from one directory read."""
+    try:
+        with os.scandir(root) as it:
+            return {e.name: e.path for e in it if e.name in MANIFEST_FILES and e.is_file()}
+    except OSError:
+        return {}
+
 def read_text(p):
     try: return Path(p).read_text(errors="ignore")
     except Exception: return ""
 
-def find_python_version(root: Path):
-    p = Path(root)/".python-version"
-    if p.exists(): return p.read_text().strip()
-    docker = Path(root)/"Dockerfile"
-    if docker.exists():
-        m = re.search(r"FROM\s+python:(\d+(\.\d+)*)", read_text(docker), re.IGNORECASE)
-        if m: return m.group(1)
-    pyproject = Path(root)/"pyproject.toml"
-    if pyproject.exists():
-        m = re.search(r'python\s*=\s*"[^\d]*(\d+(\.\d+)*)', read_text(pyproject))
+def find_python_version(root: Path, manifests=None):
+    files = manifest_map(root) if manifests is None else manifests
+    if ".python-version" in files: return read_text(files[".python-version"]).strip()
+    m = _PY_DOCKER.search(_read_dockerfile(files))
+    if m: return m.group(1).decode()
+    if "pyproject.toml" in files:
+        m = _PY_PYPROJECT.search(read_text(files["pyproject.toml"]))
         if m: return m.group(1)
     return None
 
-def find_node_version(root: Path):
+def find_node_version(root: Path, manifests=None):
+    files = manifest_map(root) if manifests is None else manifests
     for fname in [".nvmrc",".node-version"]:
-        p = Path(root)/fname
-        if p.exists(): return p.read_text().strip().lstrip("v")
-    docker = Path(root)/"Dockerfile"
-    if docker.exists():
-        m = re.search(r"FROM\s+node:(\d+(\.\d+)*)", read_text(docker), re.IGNORECASE)
-        if m: return m.group(1)
-    pkgjson = Path(root)/"package.json"
-    if pkgjson.exists():
+        if fname in files: return read_text(files[fname]).strip().lstrip("v")
+    m = _NODE_DOCKER.search(_read_dockerfile(files))
+    if m: return m.group(1).decode()
+    if "package.json" in files:
         try:
-            data = json.loads(read_text(pkgjson) or "{}")
+            data = json.loads(read_text(files["package.json"]) or "{}")
             node = (data.get("engines",{}) or {}).get("node")
             if node:
-                m = re.search(r"(\d+(\.\d+)*)", node)
+                m = _VERSION.search(node)
                 if m: return m.group(1)
         except Exception: pass
     return None
 
-def find_os_from_docker(root: Path):
-    docker = Path(root)/"Dockerfile"
-    if not docker.exists(): return None
-    text = read_text(docker)
-    m = re.search(r"FROM\s+(ubuntu|debian|alpine|centos|rockylinux|rhel):([\w\.\-]+)", text, re.IGNORECASE)
+def find_os_from_docker(root: Path, manifests=None):
+    files = manifest_map(root) if manifests is None else manifests
+    m = _OS_DOCKER.search(_read_dockerfile(files))
     if not m: return None
-    name = m.group(1).lower(); ver = m.group(2)
+    name = m.group(1).decode().lower(); ver = m.group(2).decode()
     if name=="rockylinux": name="rocky"
     return name, ver
@@ -1,34 +1,101 @@
-import requests, datetime as dt
+import asyncio, concurrent.futures, httpx, datetime as dt
+from .cache import memoize, DAY
+from . import http
 
-def pypi_last_release(pkg):
+PYPI_URL = "https://pypi.org/pypi/{}/json"
+NPM_URL = "https://registry.npmjs.org/{}"
+
+def _latest_upload(files):
+    latest=None
+    for f in files or []:
+        ts = f.get("upload_time_iso_8601") or f.get("upload_time")
+        if ts:
+            t = dt.datetime.fromisoformat(ts.replace("Z","+00:00"))
+            if (not latest) or t>latest: latest=t
+    return latest
+
+def _pypi_release_date(data, strict=False):
+    """Upload date of info.version; strict=True scans every release instead."""
+    releases = data.get("releases", {})
+    latest = None
+    if not strict:
+        latest = _latest_upload(releases.get((data.get("info") or {}).get("version")))
+    if latest is None:
+        for files in releases.values():
+            t = _latest_upload(files)
+            if t and ((not latest) or t>latest): latest=t
+    return latest.date().isoformat() if latest else None
+
+def _npm_release_date(data):
+    time = data.get("time", {})
+    modified = time.get("modified") or time.get("created")
+    return modified.split("T")[0] if modified else None
+
+@memoize(ttl=DAY)
+def pypi_last_release(pkg, strict=False):
     try:
-        r = requests.get(f"https://pypi.org/pypi/{pkg}/json", timeout=20)
+        r = http.get(PYPI_URL.format(pkg), timeout=20)
         if r.status_code!=200: return None
-        data = r.json(); releases = data.get("releases", {})
-        latest=None
-        for ver, files in releases.items():
-            for f in files or []:
-                ts = f.get("upload_time_iso_8601") or f.get("upload_time")
-                if ts:
-                    t = dt.datetime.fromisoformat(ts.replace("Z","+00:00"))
-                    if (not latest) or t>latest: latest=t
-        return latest.date().isoformat() if latest else None
+        return _pypi_release_date(r.json(), strict=strict)
     except Exception:
         return None
 
+@memoize(ttl=DAY)
 def npm_last_release(pkg):
     try:
-        r = requests.get(f"https://registry.npmjs.org/{pkg}", timeout=20)
+        r = http.get(NPM_URL.format(pkg), timeout=20)
         if r.status_code!=200: return None
-        data = r.json(); time = data.get("time", {})
-        modified = time.get("modified") or time.get("created")
-        return modified.split("T")[0] if modified else None
+        return _npm_release_date(r.json())
     except Exception:
         return None
 
-def stale_status(last_release_date, months_stale=24):
+async def _fetch_many(url, pkgs, extract):
+    slots = asyncio.Semaphore(http.HTTP_CONCURRENCY)
+    limits = httpx.Limits(max_connections=http.HTTP_CONCURRENCY)
+    headers = {"User-Agent": http.USER_AGENT}
+    async with httpx.AsyncClient(http2=http.HTTP2, limits=limits, headers=headers, timeout=20) as client:
+        async def one(pkg):
+            try:
+                r = await http.async_get(client, url.format(pkg), slots)
+                if r.status_code!=200: return pkg, None
+                return pkg, extract(r.json())
+            except Exception:
+                return pkg, None
+        return dict(await asyncio.gather(*[one(p) for p in pkgs]))
+
+def _run(coro):
+    """Run a coroutine to completion, even when called from inside an event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(asyncio.run, coro).result()
+
+def _last_release_many(pkgs, cached_fn, url, extract):
+    out, missing = {}, []
+    for pkg in dict.fromkeys(pkgs):
+        last = cached_fn.cache_get(pkg)
+        if last is None: missing.append(pkg)
+        else: out[pkg] = last
+    if missing:
+        fetched = _run(_fetch_many(url, missing, extract))
+        for pkg, last in fetched.items():
+            cached_fn.cache_set(last, pkg)
+            out[pkg] = last
+    return out
+
+def pypi_last_release_many(pkgs: list[str]) -> dict[str, str | None]:
+    """Concurrent pypi_last_release over many packages: {pkg: date or None}."""
+    return _last_release_many(pkgs, pypi_last_release, PYPI_URL, _pypi_release_date)
+
+def npm_last_release_many(pkgs: list[str]) -> dict[str, str | None]:
+    """Concurrent npm_last_release over many packages: {pkg: date or None}."""
+    return _last_release_many(pkgs, npm_last_release, NPM_URL, _npm_release_date)
+
+def stale_status(last_release_date, months_stale=24, today=None):
     if not last_release_date: return None
     try: d = dt.date.fromisoformat(last_release_date)
     except Exception: return None
-    delta = (dt.date.today() - d).days
+    delta = ((today or dt.date.today()) - d).days
     return ("Potentially unmaintained", -delta) if delta >= months_stale*30 else ("Maintained", -delta)
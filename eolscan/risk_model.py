@@ -3,20 +3,33 @@ Maintenance Risk Model - ML-powered risk assessment for packages and runtimes
 """
 
 import numpy as np
-import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
-import pickle
+import joblib
 import os
 from pathlib import Path
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
 import logging
 
+try:
+    import treelite
+    import treelite.gtil
+except ImportError:  # optional: compiled tree inference
+    treelite = None
+
 logger = logging.getLogger(__name__)
 
+# Lower bounds of LOW, MEDIUM, HIGH, CRITICAL (np.digitize bins)
+RISK_THRESHOLDS = [0.2, 0.4, 0.6, 0.8]
+RISK_LEVELS = ("MINIMAL", "LOW", "MEDIUM", "HIGH", "CRITICAL")
+
+# Ecosystem popularity feature: small-int code per ecosystem indexes _ECO_POP;
+# the last slot (0.5) is for unknown ecosystems
+_ECO_CODE = {'PyPI': 0, 'npm': 1, 'Maven': 2, 'NuGet': 3, 'RubyGems': 4, 'Cargo': 5, 'Go': 6}
+_ECO_UNKNOWN = len(_ECO_CODE)
+_ECO_POP = np.array([0.9, 0.9, 0.8, 0.7, 0.6, 0.7, 0.8, 0.5], dtype=np.float32)
+
 class MaintenanceRiskModel:
     """
     ML model to assess maintenance risk of packages and runtimes.
@@ -25,6 +38,8 @@ class MaintenanceRiskModel:
     
     def __init__(self, model_path: Optional[str] = None):
         self.model = None
+        self._compiled = None
+        self._ml_ready = False  # model fitted and scaler fitted; see _check_ml_ready
         self.scaler = StandardScaler()
         self.feature_names = [
             'days_to_eol', 'days_since_last_release', 'release_frequency',
@@ -38,11 +53,14 @@ class MaintenanceRiskModel:
         """Load existing model or initialize a new one"""
         if os.path.exists(self.model_path):
             try:
-                with open(self.model_path, 'rb') as f:
-                    model_data = pickle.load(f)
-                    self.model = model_data['model']
-                    self.scaler = model_data['scaler']
+                # Arrays are memory-mapped from the (uncompressed) file instead of
+                # copied onto the heap; plain pickle files from older versions load too
+                model_data = joblib.load(self.model_path, mmap_mode='r')
+                self.model = model_data['model']
+                self.scaler = model_data['scaler']
                 logger.info(f"Loaded existing model from {self.model_path}")
+                self._compile_predictor()
+                self._ml_ready = self._check_ml_ready()
             except Exception as e:
                 logger.warning(f"Failed to load model: {e}. Initializing new model.")
                 self._initialize_model()
@@ -51,14 +69,47 @@ class MaintenanceRiskModel:
     
     def _initialize_model(self):
         """Initialize a new Random Forest model"""
+        # Small forest: 8 features don't need 100 deep trees, and shallow trees
+        # keep the model file, load time and per-prediction traversal small
         self.model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
+            n_estimators=30,
+            max_depth=6,
+            max_features='sqrt',
             random_state=42,
             class_weight='balanced'
         )
+        self._compiled = None
+        self._ml_ready = False
         logger.info("Initialized new maintenance risk model")
     
+    def _check_ml_ready(self) -> bool:
+        """Whether the model is trained and the scaler fitted; cached in self._ml_ready"""
+        return bool(
+            self.model is not None and
+            hasattr(self.model, 'estimators_') and
+            self.model.estimators_ and
+            hasattr(self.scaler, 'mean_') and
+            self.scaler.mean_ is not None
+        )
+    
+    def _compile_predictor(self):
+        """Convert the fitted forest to a Treelite model for faster inference (if installed)"""
+        self._compiled = None
+        if treelite is None:
+            return
+        try:
+            self._compiled = treelite.sklearn.import_model(self.model)
+            logger.info("Using Treelite predictor for risk model inference")
+        except Exception as e:
+            logger.warning(f"Treelite import failed, using scikit-learn inference: {e}")
+    
+    def _predict_proba(self, features_scaled: np.ndarray) -> np.ndarray:
+        """Class probabilities via Treelite when compiled, else scikit-learn"""
+        if self._compiled is not None:
+            X = np.ascontiguousarray(features_scaled, dtype=np.float32)
+            return treelite.gtil.predict(self._compiled, X).reshape(len(X), -1)
+        return self.model.predict_proba(features_scaled)
+    
     def extract_features(self, scan_result: Dict) -> np.ndarray:
         """
         Extract features from scan result for risk assessment
@@ -96,108 +147,148 @@ class MaintenanceRiskModel:
         
         # ecosystem_popularity (based on ecosystem type)
         ecosystem = scan_result.get('ecosystem', 'unknown')
-        popularity_map = {
-            'PyPI': 0.9, 'npm': 0.9, 'Maven': 0.8, 'NuGet': 0.7,
-            'RubyGems': 0.6, 'Cargo': 0.7, 'Go': 0.8
-        }
-        features.append(popularity_map.get(ecosystem, 0.5))
+        features.append(_ECO_POP[_ECO_CODE.get(ecosystem, _ECO_UNKNOWN)])
         
         # maintainer_count (placeholder)
         features.append(1.0)  # Default single maintainer
         
         return np.array(features).reshape(1, -1)
     
-    def calculate_risk_score(self, scan_result: Dict) -> Dict:
+    def extract_features_batch(self, scan_results: List[Dict]) -> np.ndarray:
         """
-        Calculate risk score for a given scan result
-        Returns: {'risk_score': float, 'risk_level': str, 'confidence': float}
+        Extract features for many scan results at once as an (N, 8) array,
+        using the same normalization as extract_features
+        """
+        n = len(scan_results)
+        X = np.empty((n, len(self.feature_names)), dtype=np.float32)
+        
+        # days_to_eol: EOL (negative) = 1, otherwise 1 year out = 0 risk
+        days_to_eol = np.fromiter(
+            ((s.get('days_to_eol', 0) or 0) for s in scan_results), dtype=np.float64, count=n
+        )
+        X[:, 0] = np.where(days_to_eol < 0, 1.0, np.clip(1 - days_to_eol / 365, 0, 1))
+        
+        # days_since_last_release: 2 years = max risk
+        days_since_release = np.fromiter(
+            ((s.get('days_since_release', 0) or 0) for s in scan_results), dtype=np.float64, count=n
+        )
+        X[:, 1] = np.minimum(1.0, days_since_release / 730)
+        
+        # release_frequency, advisory_count, security_advisory_count, dependency_count (placeholders)
+        X[:, 2:6] = (0.5, 0.0, 0.0, 0.1)
+        
+        # ecosystem_popularity
+        codes = np.fromiter(
+            (_ECO_CODE.get(s.get('ecosystem', 'unknown'), _ECO_UNKNOWN) for s in scan_results),
+            dtype=np.int8, count=n
+        )
+        X[:, 6] = _ECO_POP[codes]
+        
+        # maintainer_count (placeholder)
+        X[:, 7] = 1.0
+        
+        return X
+    
+    def calculate_risk_scores(self, scan_results: List[Dict]) -> List[Dict]:
         """
+        Calculate risk scores for many scan results with one model call
+        Returns one {'risk_score', 'risk_level', 'confidence', 'features_used'} dict per input
+        """
+        if not scan_results:
+            return []
+        
         try:
-            features = self.extract_features(scan_result)
+            features = self.extract_features_batch(scan_results)
+            scores = confidence = None
             
-            # Check if model is properly trained and scaler is fitted
-            if (self.model is not None and 
-                hasattr(self.model, 'estimators_') and 
-                self.model.estimators_ and
-                hasattr(self.scaler, 'mean_') and 
-                self.scaler.mean_ is not None):
-                
+            # Use the ML model only if it is trained and the scaler is fitted
+            if self._ml_ready:
                 try:
-                    features_scaled = self.scaler.transform(features)
-                    risk_prob = self.model.predict_proba(features_scaled)[0]
-                    risk_score = risk_prob[1] if len(risk_prob) > 1 else 0.5
-                    confidence = max(risk_prob)
+                    features_scaled = self.scaler.transform(features, copy=False)  # features is ours to overwrite
+                    risk_prob = self._predict_proba(features_scaled)
+                    if risk_prob.shape[1] > 1:
+                        scores = risk_prob[:, 1]
+                    else:
+                        scores = np.full(len(scan_results), 0.5)
+                    confidence = risk_prob.max(axis=1)
                 except Exception as model_error:
                     logger.warning(f"ML model failed, falling back to rule-based: {model_error}")
-                    risk_score = self._rule_based_score(scan_result)
-                    confidence = 0.7
-            else:
+                    scores = None
+            
+            if scores is None:
                 # Fallback to rule-based scoring
-                risk_score = self._rule_based_score(scan_result)
-                confidence = 0.7
+                scores = self._rule_based_score_batch(scan_results)
+                confidence = np.full(len(scan_results), 0.7)
             
-            # Determine risk level
-            if risk_score >= 0.8:
-                risk_level = "CRITICAL"
-            elif risk_score >= 0.6:
-                risk_level = "HIGH"
-            elif risk_score >= 0.4:
-                risk_level = "MEDIUM"
-            elif risk_score >= 0.2:
-                risk_level = "LOW"
-            else:
-                risk_level = "MINIMAL"
+            # Determine risk levels
+            levels = np.digitize(scores, RISK_THRESHOLDS)
             
-            return {
-                'risk_score': round(risk_score, 3),
-                'risk_level': risk_level,
-                'confidence': round(confidence, 3),
-                'features_used': self.feature_names
-            }
+            return [
+                {
+                    'risk_score': round(float(score), 3),
+                    'risk_level': RISK_LEVELS[level],
+                    'confidence': round(float(conf), 3),
+                    'features_used': self.feature_names
+                }
+                for score, level, conf in zip(scores, levels, confidence)
+            ]
             
         except Exception as e:
             logger.error(f"Error calculating risk score: {e}")
-            return {
-                'risk_score': 0.5,
-                'risk_level': 'UNKNOWN',
-                'confidence': 0.0,
-                'error': str(e)
-            }
+            return [
+                {
+                    'risk_score': 0.5,
+                    'risk_level': 'UNKNOWN',
+                    'confidence': 0.0,
+                    'error': str(e)
+                }
+                for _ in scan_results
+            ]
+    
+    def calculate_risk_score(self, scan_result: Dict) -> Dict:
+        """
+        Calculate risk score for a given scan result
+        Returns: {'risk_score': float, 'risk_level': str, 'confidence': float}
+        """
+        return self.calculate_risk_scores([scan_result])[0]
     
     def _rule_based_score(self, scan_result: Dict) -> float:
         """
         Fallback rule-based scoring when ML model is not available
         """
-        score = 0.0
+        return float(self._rule_based_score_batch([scan_result])[0])
+    
+    def _rule_based_score_batch(self, scan_results: List[Dict]) -> np.ndarray:
+        """
+        Rule-based scores for many scan results, computed with numpy masks
+        """
+        n = len(scan_results)
         
         # EOL status contribution
-        status = scan_result.get('status', 'Unknown')
-        if status == 'EOL':
-            score += 0.6
-        elif status == 'Near EOL':
-            score += 0.4
-        elif status == 'Supported':
-            score += 0.1
-        
-        # Days to EOL contribution
-        days_to_eol = scan_result.get('days_to_eol', 0)
-        if days_to_eol is not None:
-            if days_to_eol < 0:  # Already EOL
-                score += 0.3
-            elif days_to_eol < 30:  # Very near EOL
-                score += 0.2
-            elif days_to_eol < 90:  # Near EOL
-                score += 0.1
+        status = np.array([s.get('status', 'Unknown') for s in scan_results], dtype=object)
+        score = np.select(
+            [status == 'EOL', status == 'Near EOL', status == 'Supported'], [0.6, 0.4, 0.1], 0.0
+        )
+        
+        # Days to EOL contribution (a missing key counts as 0 days, None as no data)
+        days_to_eol = np.fromiter(
+            (np.inf if d is None else d for d in (s.get('days_to_eol', 0) for s in scan_results)),
+            dtype=np.float64, count=n
+        )
+        score += np.select(
+            [days_to_eol < 0, days_to_eol < 30, days_to_eol < 90], [0.3, 0.2, 0.1], 0.0
+        )
         
         # Package staleness contribution
-        if scan_result.get('type') == 'package':
-            days_since_release = scan_result.get('days_since_release', 0)
-            if days_since_release and days_since_release > 730:  # 2+ years
-                score += 0.2
-            elif days_since_release and days_since_release > 365:  # 1+ years
-                score += 0.1
-        
-        return min(1.0, score)
+        is_package = np.fromiter((s.get('type') == 'package' for s in scan_results), dtype=bool, count=n)
+        days_since_release = np.fromiter(
+            ((s.get('days_since_release', 0) or 0) for s in scan_results), dtype=np.float64, count=n
+        )
+        score += np.where(
+            is_package, np.select([days_since_release > 730, days_since_release > 365], [0.2, 0.1], 0.0), 0.0
+        )
+        
+        return np.minimum(1.0, score)
     
     def train(self, training_data: List[Dict]):
         """
@@ -226,17 +317,23 @@ class MaintenanceRiskModel:
         X = np.array(X)
         y = np.array(y)
         
-        # Split data
+        # Split data (imported here so API startup doesn't pay for model_selection)
+        from sklearn.model_selection import train_test_split
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=42
         )
         
+        # Scaler and model are inconsistent until both are refit: score rule-based meanwhile
+        self._ml_ready = False
+        
         # Scale features
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
         
         # Train model
         self.model.fit(X_train_scaled, y_train)
+        self._compile_predictor()
+        self._ml_ready = self._check_ml_ready()
         
         # Evaluate
         y_pred = self.model.predict(X_test_scaled)
@@ -250,8 +347,11 @@ class MaintenanceRiskModel:
         }
         
         try:
-            with open(self.model_path, 'wb') as f:
-                pickle.dump(model_data, f)
+            # No compression: joblib can only mmap uncompressed files. Write then
+            # rename so a previously loaded (mmapped) model file is never truncated
+            tmp_path = f"{self.model_path}.tmp"
+            joblib.dump(model_data, tmp_path)
+            os.replace(tmp_path, self.model_path)
             logger.info(f"Model saved to {self.model_path}")
         except Exception as e:
             logger.error(f"Failed to save model: {e}")
@@ -277,3 +377,16 @@ def assess_risk(scan_result: Dict) -> Dict:
     result.update(risk_assessment)
     
     return result
+
+def assess_risks(scan_results: List[Dict]) -> List[Dict]:
+    """Batch version of assess_risk: one model call for all scan results"""
+    model = get_risk_model()
+    assessments = model.calculate_risk_scores(scan_results)
+    
+    results = []
+    for scan_result, risk_assessment in zip(scan_results, assessments):
+        result = scan_result.copy()
+        result.update(risk_assessment)
+        results.append(result)
+    
+    return results
@@ -1,15 +1,32 @@
-import json, base64, re
+import asyncio, base64, bisect, itertools, re, httpx
 from pathlib import Path
-import requests
+from . import http
+from .http import SESSION
+from .util import json_loads
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+__all__ = ["fetch_github_sbom", "fetch_github_sbom_many", "parse_local_sbom", "runtime_hits"]
 
 # ------------------- GitHub SBOM (kept as-is) -------------------
-def fetch_github_sbom(owner_repo: str, token: str = None):
+SBOM_URL = "https://api.github.com/repos/{}/{}/dependency-graph/sbom"
+SBOM_CONCURRENCY = 10
+
+def _sbom_url(owner_repo: str) -> str:
     owner, name = owner_repo.split("/", 1)
-    url = f"https://api.github.com/repos/{owner}/{name}/dependency-graph/sbom"
+    return SBOM_URL.format(owner, name)
+
+def _sbom_headers(token: str = None):
     headers = {"Accept": "application/vnd.github+json", "User-Agent": "eol-eos-scanner"}
     if token:
         headers["Authorization"] = f"Bearer {token}"
-    r = requests.get(url, headers=headers, timeout=30)
+    return headers
+
+def _sbom_content(r):
+    """(spdx_text, None) or (None, error) from a requests/httpx response"""
     if r.status_code != 200:
         return None, f"HTTP {r.status_code}: {r.text[:120]}"
     data = r.json()
@@ -22,59 +39,159 @@ def fetch_github_sbom(owner_repo: str, token: str = None):
     except Exception as e:
         return None, f"Decode error: {e}"
 
+def fetch_github_sbom(owner_repo: str, token: str = None):
+    r = SESSION.get(_sbom_url(owner_repo), headers=_sbom_headers(token), timeout=30)
+    return _sbom_content(r)
+
+async def fetch_github_sbom_many(repos, token: str = None):
+    """
+    Fetch SBOMs for many repos concurrently over one HTTP/2 client, under the
+    shared rate limit. Returns {owner_repo: (spdx_text, error)}; repos whose
+    request raised or ended in a retryable status (429/5xx) are left out so
+    the caller can retry them with fetch_github_sbom.
+    """
+    slots = asyncio.Semaphore(SBOM_CONCURRENCY)
+    async with httpx.AsyncClient(http2=http.HTTP2, headers=_sbom_headers(token), timeout=30) as client:
+        async def one(owner_repo):
+            try:
+                r = await http.async_get(client, _sbom_url(owner_repo), slots)
+                if r.status_code in http.RETRY_STATUSES:
+                    return owner_repo, None
+                return owner_repo, _sbom_content(r)
+            except Exception:
+                return owner_repo, None
+        fetched = await asyncio.gather(*[one(repo) for repo in dict.fromkeys(repos)])
+    return {repo: result for repo, result in fetched if result is not None}
+
 # ------------------- Local SBOM parsing (NEW) -------------------
+# Files at least this large are stream-parsed (when ijson is installed)
+SBOM_STREAM_THRESHOLD = 8 * 1024 * 1024
+
+def _sbom_format(top: dict):
+    """'spdx' / 'cyclonedx' / None from top-level document keys"""
+    if "spdxVersion" in top or str(top.get("$schema", "")).find("spdx") != -1:
+        return "spdx"
+    if str(top.get("bomFormat", "")).lower() == "cyclonedx":
+        return "cyclonedx"
+    return None
+
+def _to_components(items, version_keys):
+    """Named items as parallel lists: {'names': [...], 'versions': [...]}"""
+    names, versions = [], []
+    for item in items:
+        name = item.get("name")
+        if name:
+            names.append(name)
+            versions.append(next((item[k] for k in version_keys if item.get(k)), ""))
+    return {"names": names, "versions": versions}
+
+_VERSION_KEYS = {"spdx": ("versionInfo", "version"), "cyclonedx": ("version",)}
+_ITEMS_KEY = {"spdx": "packages", "cyclonedx": "components"}
+
+def _stream_sbom(p: Path):
+    """Sniff the format from top-level scalar keys, then stream only the component list"""
+    top = {}
+    with p.open("rb") as f:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if prefix in ("spdxVersion", "$schema", "bomFormat") and event in ("string", "number"):
+                top[prefix] = value
+                fmt = _sbom_format(top)
+                if fmt:
+                    break
+        else:
+            return None, None
+    with p.open("rb") as f:
+        items = ijson.items(f, _ITEMS_KEY[fmt] + ".item", use_float=True)
+        return fmt, _to_components(items, _VERSION_KEYS[fmt])
+
 def parse_local_sbom(path: str | Path):
     """
-    Returns a list of {'name': str, 'version': str} components
-    from an SPDX JSON or CycloneDX JSON file.
+    Returns the components of an SPDX JSON or CycloneDX JSON file as parallel
+    lists: {'names': list[str], 'versions': list[str]}.
+    Large files are streamed with ijson so the whole document is never in memory.
     """
     p = Path(path)
-    data = json.loads(p.read_text(encoding="utf-8"))
-
-    # SPDX JSON?
-    if isinstance(data, dict) and ("spdxVersion" in data or data.get("$schema","").find("spdx") != -1):
-        comps = []
-        for pkg in data.get("packages", []) or []:
-            name = pkg.get("name")
-            ver = pkg.get("versionInfo") or pkg.get("version") or ""
-            if name:
-                comps.append({"name": name, "version": ver})
-        return comps
-
-    # CycloneDX JSON?
-    if str(data.get("bomFormat", "")).lower() == "cyclonedx":
-        comps = []
-        for c in data.get("components", []) or []:
-            name = c.get("name")
-            ver = c.get("version") or ""
-            if name:
-                comps.append({"name": name, "version": ver})
-        return comps
-
-    raise ValueError("Unknown SBOM format: expected SPDX JSON or CycloneDX JSON")
-
-# Heuristics to detect runtimes/OS among components
-_RUNTIME_PATTERNS = [
-    ("python", re.compile(r"(^python$|^cpython$|python\b)", re.I)),
-    ("nodejs", re.compile(r"(^node$|^node\.?js$|nodejs)", re.I)),
-    ("ubuntu", re.compile(r"\bubuntu\b", re.I)),
-    ("debian", re.compile(r"\bdebian\b", re.I)),
-    ("alpine", re.compile(r"\balpine\b", re.I)),
-    ("rocky-linux", re.compile(r"\brockylinux|rocky\b", re.I)),
-    ("rhel", re.compile(r"\brhel\b|\bred hat\b", re.I)),
+    if ijson is not None and p.stat().st_size >= SBOM_STREAM_THRESHOLD:
+        fmt, comps = _stream_sbom(p)
+    else:
+        data = json_loads(p.read_bytes())
+        fmt = _sbom_format(data) if isinstance(data, dict) else None
+        comps = _to_components(data.get(_ITEMS_KEY[fmt], []) or [], _VERSION_KEYS[fmt]) if fmt else None
+
+    if fmt is None:
+        raise ValueError("Unknown SBOM format: expected SPDX JSON or CycloneDX JSON")
+    return comps
+
+# Heuristics to detect runtimes/OS among components (checked in this order)
+# (slug, pattern, keywords): every match of the pattern contains one of its
+# lowercase keywords, which is what the substring prefilter below looks for
+_RUNTIMES = [
+    ("python", r"(^python$|^cpython$|python\b)", ("python",)),
+    ("nodejs", r"(^node$|^node\.?js$|nodejs)", ("node",)),
+    ("ubuntu", r"\bubuntu\b", ("ubuntu",)),
+    ("debian", r"\bdebian\b", ("debian",)),
+    ("alpine", r"\balpine\b", ("alpine",)),
+    ("rocky-linux", r"\brockylinux|rocky\b", ("rocky",)),
+    ("rhel", r"\brhel\b|\bred hat\b", ("rhel", "red hat")),
 ]
+_RUNTIME_PATTERNS = [(slug, re.compile(pat, re.I)) for slug, pat, _ in _RUNTIMES]
+_RUNTIME_KEYWORDS = tuple(dict.fromkeys(kw for _, _, keywords in _RUNTIMES for kw in keywords))
+_RUNTIME_NAMES = {"python": "Python", "nodejs": "Node.js"}
+
+# One pass over the lowercased name for all patterns; group g<i> is pattern i
+# (slugs like "rocky-linux" aren't valid group names)
+_RUNTIME_RE = re.compile("|".join(f"(?P<g{i}>{pat})" for i, (_, pat, _) in enumerate(_RUNTIMES)))
+
+def _first_match_per_name(lowered):
+    """(index, match) for every name with a runtime match, in order"""
+    # Find keyword occurrences in all names joined into one string (C-speed
+    # str.find), map offsets back to names, and only regex-search those
+    text = "\n".join(lowered)
+    starts = list(itertools.accumulate((len(n) + 1 for n in lowered), initial=0))
+    candidates = set()
+    for kw in _RUNTIME_KEYWORDS:
+        pos = text.find(kw)
+        while pos != -1:
+            idx = bisect.bisect_right(starts, pos) - 1
+            candidates.add(idx)
+            pos = text.find(kw, starts[idx + 1])  # continue with the next name
+    for idx in sorted(candidates):
+        m = _RUNTIME_RE.search(lowered[idx])
+        if m:
+            yield idx, m
+
+def _runtime_pattern_index(name):
+    """Index of the first _RUNTIME_PATTERNS entry that matches name, or None"""
+    return next((i for i, (_, pat) in enumerate(_RUNTIME_PATTERNS) if pat.search(name)), None)
 
 def runtime_hits(components):
     """
-    From [{'name','version'}] → [{'slug','name','version'}] for runtimes/OS.
+    From parse_local_sbom's {'names','versions'} lists → [{'slug','name','version'}]
+    for runtimes/OS.
     """
+    names = [n.strip() for n in components["names"]]
+    versions = components["versions"]
+    
+    # lower() is an exact case fold only for ASCII ("İ" lowers to two characters,
+    # "ſ" matches "s" only under re.I), so other names skip the fused fast path
+    # and are checked pattern by pattern on the original name
+    lowered = [n.lower() if n.isascii() else "" for n in names]
+    found = {}
+    for idx, m in _first_match_per_name(lowered):
+        # the fused search returns the leftmost match; an earlier pattern in
+        # the list may still match further along the name and takes priority
+        i = int(m.lastgroup[1:])
+        found[idx] = next((j for j in range(i) if _RUNTIME_PATTERNS[j][1].search(names[idx])), i)
+    for idx, n in enumerate(names):
+        if not n.isascii():
+            i = _runtime_pattern_index(n)
+            if i is not None:
+                found[idx] = i
+    
     hits = []
-    for comp in components:
-        n = (comp.get("name") or "").strip()
-        v = (comp.get("version") or "").strip()
-        for slug, pat in _RUNTIME_PATTERNS:
-            if pat.search(n):
-                norm_name = {"python":"Python", "nodejs":"Node.js"}.get(slug, n.title())
-                hits.append({"slug": slug, "name": norm_name, "version": v})
-                break
+    for idx in sorted(found):
+        n = names[idx]
+        slug = _RUNTIME_PATTERNS[found[idx]][0]
+        v = (versions[idx] or "").strip()
+        hits.append({"slug": slug, "name": _RUNTIME_NAMES.get(slug, n.title()), "version": v})
     return hits
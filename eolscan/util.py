@@ -1,11 +1,27 @@
-import re, datetime as dt
+import re, json, functools, datetime as dt
 from dateutil import parser as dtp
 import logging
+from logging.handlers import RotatingFileHandler
 import os
-from typing import Optional
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+__all__ = [
+    "setup_logging", "parse_semver", "parse_date", "days_until", "status_from_eol",
+    "validate_github_repo", "sanitize_filename", "format_bytes", "json_dumps", "json_loads",
+]
+
+_LOG_INITIALIZED = False
 
 def setup_logging(level: Optional[str] = None):
-    """Setup logging configuration"""
+    """Setup logging configuration (only the first call has an effect)"""
+    global _LOG_INITIALIZED
+    if _LOG_INITIALIZED:
+        return
     if level is None:
         level = os.getenv("LOG_LEVEL", "INFO")
     
@@ -17,43 +33,76 @@ def setup_logging(level: Optional[str] = None):
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
             logging.StreamHandler(),
-            logging.FileHandler('reports/eol_scanner.log')
+            RotatingFileHandler('reports/eol_scanner.log', maxBytes=10_000_000, backupCount=3)
         ]
     )
+    _LOG_INITIALIZED = True
+
+_SEMVER_RE = re.compile(r"\d+\.\d+(?:\.\d+)?")
 
+@functools.lru_cache(maxsize=4096)
 def parse_semver(text):
-    m = re.search(r"(\d+\.\d+(\.\d+)?)", text or "");
-    return m.group(1) if m else None
+    m = _SEMVER_RE.search(text) if text else None
+    return m.group(0) if m else None
 
+@functools.lru_cache(maxsize=4096)
 def parse_date(s):
     if not s: return None
+    # ISO "YYYY-MM-DD" (endoflife.date format) without the generic parser
+    try: return dt.date.fromisoformat(s[:10])
+    except (ValueError, TypeError): pass
     try: return dtp.parse(s).date()
     except Exception: return None
 
-def days_until(date_str):
+def days_until(date_str, today=None):
     d = parse_date(date_str)
     if not d: return None
-    return (d - dt.date.today()).days
+    return (d - (today or dt.date.today())).days
 
-def status_from_eol(eol_date, near_months=6):
-    days = days_until(eol_date)
+def status_from_eol(eol_date, near_months=6, today=None):
+    days = days_until(eol_date, today)
     if days is None: return "Unknown", None
     if days < 0: return "EOL", days
     if days <= near_months*30: return "Near EOL", days
     return "Supported", days
 
+_REPO_RE = re.compile(r'^[a-zA-Z0-9._-]+/[a-zA-Z0-9._-]+$')
+_SANI_RE = re.compile(r'[^a-zA-Z0-9._-]')
+_BYTE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+@functools.lru_cache(maxsize=8192)
 def validate_github_repo(repo: str) -> bool:
     """Validate GitHub repository format"""
-    return bool(re.match(r'^[a-zA-Z0-9._-]+/[a-zA-Z0-9._-]+$', repo))
+    return bool(_REPO_RE.match(repo))
 
+@functools.lru_cache(maxsize=8192)
 def sanitize_filename(filename: str) -> str:
     """Sanitize filename for safe file operations"""
-    return re.sub(r'[^a-zA-Z0-9._-]', '_', filename)
+    return _SANI_RE.sub('_', filename)
 
 def format_bytes(bytes_value: int) -> str:
     """Format bytes to human readable format"""
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if bytes_value < 1024.0:
-            return f"{bytes_value:.1f} {unit}"
-        bytes_value /= 1024.0
-    return f"{bytes_value:.1f} TB"
+    if bytes_value < 1024:
+        return f"{bytes_value:.1f} B"
+    # every 10 bits is one 1024x unit step
+    exp = min((int(bytes_value).bit_length() - 1) // 10, len(_BYTE_UNITS) - 1)
+    return f"{bytes_value / 1024 ** exp:.1f} {_BYTE_UNITS[exp]}"
+
+def _json_default(obj: Any) -> Any:
+    """Serialize numpy scalars/arrays that the JSON encoders don't handle natively"""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes; uses orjson when installed, stdlib json otherwise"""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=_json_default, option=option)
+    return json.dumps(obj, indent=2 if indent else None, default=_json_default).encode("utf-8")
+
+def json_loads(data: bytes | str) -> Any:
+    """Parse JSON bytes/str; uses orjson when installed, stdlib json otherwise"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)